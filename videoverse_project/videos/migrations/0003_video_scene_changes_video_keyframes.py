@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('videos', '0002_alter_video_duration_alter_video_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='scene_changes',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='keyframes',
+            field=models.JSONField(null=True),
+        ),
+    ]
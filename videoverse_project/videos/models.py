@@ -6,6 +6,8 @@ class Video(models.Model):
     size = models.BigIntegerField(null=True)  # Size in bytes
     created_at = models.DateTimeField(auto_now_add=True)
     title = models.CharField(max_length=255)
+    scene_changes = models.JSONField(null=True)  # Scene-change timestamps in seconds
+    keyframes = models.JSONField(null=True)  # [{"time": seconds, "offset": bytes}, ...]
 
     def __str__(self):
         return self.title
@@ -5,6 +5,8 @@ from .models import Video
 import time
 import os
 import moviepy.editor as mp
+import numpy as np
+from .views import detect_scene_changes, locate_cut, parse_showinfo, find_preceding_keyframe
 
 project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -177,4 +179,117 @@ class VideoE2ETestCase(TestCase):
         print(f"Trim response data: {trim_response.data}")
         self.assertEqual(trim_response.status_code, 200)
         self.assertIn('trimmed_file', trim_response.data)
-        print("Finished test_video_trim")
\ No newline at end of file
+        print("Finished test_video_trim")
+
+class VideoIndexTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_detect_scene_changes(self):
+        print("Starting test_detect_scene_changes")
+        frames = np.zeros((20, 8, 8), dtype=np.uint8)
+        frames[10:] = 255  # Hard cut from black to white at frame 10
+        self.assertEqual(detect_scene_changes(frames), [10])
+        self.assertEqual(detect_scene_changes(frames[:10]), [])
+        print("Finished test_detect_scene_changes")
+
+    def test_locate_cut(self):
+        print("Starting test_locate_cut")
+        # 30 fps frames; the cut sits between the samples at 0.9s and 1.0s
+        decoded = [{"time": n / 30.0, "mean": 16 if n < 29 else 235} for n in range(40)]
+        self.assertEqual(locate_cut(decoded, 0.9, 1.0), 29 / 30.0)
+        print("Finished test_locate_cut")
+
+    def test_parse_showinfo(self):
+        print("Starting test_parse_showinfo")
+        # FFmpeg 4.x prints pos:, FFmpeg 7 prints duration: and no pos:
+        log = "\n".join([
+            "[Parsed_showinfo_0 @ 0x1] config in time_base: 1/30000, frame_rate: 30000/1001",
+            "[Parsed_showinfo_0 @ 0x1] n:   0 pts:      0 pts_time:0       pos:       48 fmt:yuv420p iskey:1 type:I mean:[16 128 128 ]",
+            "[Parsed_showinfo_0 @ 0x1] n:  90 pts:  90090 pts_time:3.003   duration:   1001 duration_time:0.0333667 fmt:yuv420p iskey:1 type:I mean:[235 128 128]",
+            "[Parsed_showinfo_2 @ 0x2] config in time_base: 1/30000, frame_rate: 30000/1001",
+            "[Parsed_showinfo_2 @ 0x2] n:   0 pts:      0 pts_time:0       pos:       48 fmt:yuv420p iskey:1 type:I mean:[16 128 128 ]",
+        ])
+        frames = parse_showinfo(log)
+        self.assertEqual(len(frames["0"]), 2)
+        self.assertEqual(len(frames["2"]), 1)
+        self.assertEqual(frames["0"][0], {"time": 0.0, "key": True, "offset": 48, "mean": 16})
+        self.assertEqual(frames["0"][1], {"time": 90090 / 30000.0, "key": True, "offset": None, "mean": 235})
+        print("Finished test_parse_showinfo")
+
+    def test_find_preceding_keyframe(self):
+        print("Starting test_find_preceding_keyframe")
+        keyframes = [{"time": 0.0, "offset": 48}, {"time": 2.0, "offset": 9000}, {"time": 4.0, "offset": 18000}]
+        self.assertEqual(find_preceding_keyframe(keyframes, 3.5), 2.0)
+        self.assertEqual(find_preceding_keyframe(keyframes, 4.0), 4.0)
+        self.assertEqual(find_preceding_keyframe(keyframes, 0.5), 0.0)
+        print("Finished test_find_preceding_keyframe")
+
+    def test_video_index(self):
+        print("Starting test_video_index")
+        video_path = os.path.join(project_path, 'media', 'videos', '2637-161442811_small.mp4')
+        with open(video_path, 'rb') as video_file:
+            video_data = video_file.read()
+        video_file = SimpleUploadedFile("test_video.mp4", video_data, content_type="video/mp4")
+        upload_response = self.client.post('/api/videos/upload/', {'file': video_file, 'title': 'Test Video'})
+        self.assertEqual(upload_response.status_code, 201)
+        video_id = upload_response.data['id']
+
+        index_response = self.client.get(f'/api/videos/index/{video_id}/')
+        self.assertEqual(index_response.status_code, 200)
+        self.assertIn('scene_changes', index_response.data)
+        self.assertTrue(index_response.data['keyframes'])
+        self.assertEqual(index_response.data['keyframes'][0]['time'], 0)
+        self.assertTrue(any(isinstance(keyframe['offset'], int) for keyframe in index_response.data['keyframes']))
+
+        # Suggested trims tile the whole video, split exactly at the scene changes
+        duration = Video.objects.get(pk=video_id).duration
+        trims = index_response.data['suggested_trims']
+        self.assertEqual(trims[0]['start_time'], 0)
+        self.assertEqual(trims[-1]['end_time'], duration)
+        for previous, current in zip(trims, trims[1:]):
+            self.assertEqual(previous['end_time'], current['start_time'])
+        self.assertEqual([trim['start_time'] for trim in trims[1:]], index_response.data['scene_changes'])
+        print("Finished test_video_index")
+
+    def test_video_index_built_lazily(self):
+        print("Starting test_video_index_built_lazily")
+        video_path = os.path.join(project_path, 'media', 'videos', '2637-161442811_small.mp4')
+        with open(video_path, 'rb') as video_file:
+            video_data = video_file.read()
+        video_file = SimpleUploadedFile("test_video.mp4", video_data, content_type="video/mp4")
+        video = Video.objects.create(title="Test Video", file=video_file, scene_changes=None, keyframes=None)
+
+        response = self.client.get(f'/api/videos/index/{video.id}/')
+        self.assertEqual(response.status_code, 200)
+        video.refresh_from_db()
+        self.assertIsNotNone(video.scene_changes)
+        self.assertTrue(video.keyframes)
+        self.assertIsNotNone(video.duration)
+        print("Finished test_video_index_built_lazily")
+
+    def test_video_trim_from_keyframe(self):
+        print("Starting test_video_trim_from_keyframe")
+        video_path = os.path.join(project_path, 'media', 'videos', '2637-161442811_small.mp4')
+        with open(video_path, 'rb') as video_file:
+            video_data = video_file.read()
+        video_file = SimpleUploadedFile("test_video.mp4", video_data, content_type="video/mp4")
+        upload_response = self.client.post('/api/videos/upload/', {'file': video_file, 'title': 'Test Video'})
+        self.assertEqual(upload_response.status_code, 201)
+        video_id = upload_response.data['id']
+        self.assertTrue(Video.objects.get(pk=video_id).keyframes)
+
+        # Start between keyframes so both the keyframe seek and the output offset are exercised
+        start_time = 3.3
+        end_time = min(8.3, upload_response.data['duration'])
+        trim_response = self.client.post(f'/api/videos/trim/{video_id}/', {'start_time': start_time, 'end_time': end_time})
+        self.assertEqual(trim_response.status_code, 200)
+        with mp.VideoFileClip(trim_response.data['trimmed_file']) as clip:
+            self.assertAlmostEqual(clip.duration, end_time - start_time, delta=0.1)
+        print("Finished test_video_trim_from_keyframe")
+
+    def test_video_index_not_found(self):
+        print("Starting test_video_index_not_found")
+        response = self.client.get('/api/videos/index/9999/')
+        self.assertEqual(response.status_code, 404)
+        print("Finished test_video_index_not_found")
@@ -8,6 +8,12 @@ from django.utils import timezone
 from .models import Video
 from .serializers import VideoSerializer
 from moviepy.editor import VideoFileClip,concatenate_videoclips
+from moviepy.config import get_setting
+from bisect import bisect_right
+import numpy as np
+import subprocess as sp
+import shutil
+import re
 import os
 
 # Custom validation limits
@@ -15,6 +21,20 @@ MAX_SIZE_MB = 25
 MIN_DURATION_SEC = 5
 MAX_DURATION_SEC = 25
 
+# Scene-change index settings
+SCENE_SAMPLE_FPS = 10  # Frames per second sampled for scene detection
+SCENE_FRAME_SIZE = 64  # Sampled frames are downscaled to SCENE_FRAME_SIZE x SCENE_FRAME_SIZE
+SCENE_HIST_BINS = 32
+SCENE_CHANGE_THRESHOLD = 0.4  # Histogram distance (0-1) that counts as a cut
+KEYFRAME_SEEK_EPSILON = 0.001  # Seek just past a keyframe so timestamp rounding can't land in the previous GOP
+KEYFRAME_MATCH_TOLERANCE = 0.001  # Max gap (seconds) when matching ffprobe packets to decoded keyframes
+
+SHOWINFO_PATTERN = re.compile(r"\[Parsed_showinfo_(\d+) @ [^\]]+\] (.*)")
+TIME_BASE_PATTERN = re.compile(r"config in time_base:\s*(\d+)/(\d+)")
+PTS_PATTERN = re.compile(r"\bpts:\s*(-?\d+)")
+POS_PATTERN = re.compile(r"\bpos:\s*(-?\d+)")
+MEAN_PATTERN = re.compile(r"\bmean:\[\s*(\d+)")
+
 def validate_video_file(file):
     size_in_mb = file.size / (1024 * 1024)
     if size_in_mb > MAX_SIZE_MB:
@@ -24,6 +44,122 @@ def get_video_duration(file_path):
     with VideoFileClip(file_path) as clip:
         return clip.duration
 
+def run_ffmpeg(cmd):
+    # Like moviepy.tools.subprocess_call, but hands back stdout/stderr for parsing
+    proc = sp.Popen(cmd, stdin=sp.DEVNULL, stdout=sp.PIPE, stderr=sp.PIPE)
+    out, err = proc.communicate()
+    if proc.returncode:
+        raise IOError(err.decode("utf8", errors="ignore"))
+    return out, err.decode("utf8", errors="ignore")
+
+def detect_scene_changes(frames):
+    # frames is an (N, H, W) uint8 array of luma; returns the indices i where a cut falls
+    # between sampled frames i-1 and i
+    count, height, width = frames.shape
+    if count < 2:
+        return []
+    bins = (frames // (256 // SCENE_HIST_BINS)).astype(np.int32)
+    bins += (np.arange(count, dtype=np.int32) * SCENE_HIST_BINS)[:, None, None]
+    hist = np.bincount(bins.ravel(), minlength=count * SCENE_HIST_BINS).reshape(count, SCENE_HIST_BINS)
+    hist = hist / float(height * width)
+    distances = 0.5 * np.abs(np.diff(hist, axis=0)).sum(axis=1)
+    return [int(i) for i in np.nonzero(distances > SCENE_CHANGE_THRESHOLD)[0] + 1]
+
+def locate_cut(decoded, after, until):
+    # Pin a cut found between two samples to the full-rate frame with the largest jump in mean luma
+    jumps = [(abs(current["mean"] - previous["mean"]), current["time"])
+             for previous, current in zip(decoded, decoded[1:])
+             if after < current["time"] <= until and current["mean"] is not None and previous["mean"] is not None]
+    return max(jumps)[1] if jumps else until
+
+def parse_showinfo(log):
+    # Group showinfo frame lines by filter instance; times come from the integer pts so they are exact
+    time_bases, frames = {}, {}
+    for line in log.splitlines():
+        match = SHOWINFO_PATTERN.search(line)
+        if not match:
+            continue
+        instance, info = match.groups()
+        time_base = TIME_BASE_PATTERN.search(info)
+        if time_base:
+            time_bases[instance] = float(time_base.group(1)) / float(time_base.group(2))
+            continue
+        pts = PTS_PATTERN.search(info)
+        if not pts or instance not in time_bases:
+            continue
+        pos = POS_PATTERN.search(info)
+        mean = MEAN_PATTERN.search(info)
+        frames.setdefault(instance, []).append({
+            "time": int(pts.group(1)) * time_bases[instance],
+            "key": "iskey:1" in info,
+            "offset": int(pos.group(1)) if pos and int(pos.group(1)) >= 0 else None,
+            "mean": int(mean.group(1)) if mean else None,
+        })
+    return frames
+
+def get_ffprobe_binary():
+    ffmpeg_binary = get_setting("FFMPEG_BINARY")
+    return shutil.which(os.path.join(os.path.dirname(ffmpeg_binary), "ffprobe")) or shutil.which("ffprobe")
+
+def get_keyframe_offsets(file_path):
+    # FFmpeg 7 no longer prints pos: in showinfo, so read keyframe packet offsets with ffprobe (demux only)
+    ffprobe_binary = get_ffprobe_binary()
+    if not ffprobe_binary:
+        raise IOError("ffmpeg %s does not report keyframe offsets and ffprobe was not found; "
+                      "install the imageio-ffmpeg version from requirements.txt or put ffprobe on PATH"
+                      % get_setting("FFMPEG_BINARY"))
+    out, _ = run_ffmpeg([ffprobe_binary, "-v", "error", "-select_streams", "v:0",
+                         "-show_entries", "format=start_time:packet=pts_time,pos,flags",
+                         "-of", "default=noprint_wrappers=1", file_path])
+
+    # Packet times are raw stream times; showinfo times have the file's start time subtracted
+    start_time, offsets, packet = 0.0, [], {}
+    for line in out.decode("utf8", errors="ignore").splitlines():
+        key, _, value = line.strip().partition("=")
+        if key == "start_time":
+            start_time = float(value) if value not in ("", "N/A") else 0.0
+        elif key in ("pts_time", "pos", "flags"):
+            packet[key] = value
+            if len(packet) == 3:
+                if packet["flags"].startswith("K") and packet["pos"].isdigit() and packet["pts_time"] != "N/A":
+                    offsets.append((float(packet["pts_time"]), int(packet["pos"])))
+                packet = {}
+    return [(time - start_time, offset) for time, offset in offsets]
+
+def build_video_index(file_path):
+    # One decode, capped at MAX_DURATION_SEC: the first showinfo sees every frame (keyframes, mean luma),
+    # select keeps one frame per sample interval with its original pts, and the second showinfo logs it
+    sample_filter = "select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,%s)'" % (1.0 / SCENE_SAMPLE_FPS)
+    cmd = [get_setting("FFMPEG_BINARY"), "-hide_banner", "-t", str(MAX_DURATION_SEC), "-i", file_path,
+           "-map", "0:v:0", "-vf", "showinfo,%s,showinfo,scale=%d:%d" % (sample_filter, SCENE_FRAME_SIZE, SCENE_FRAME_SIZE),
+           "-vsync", "passthrough", "-pix_fmt", "gray", "-f", "rawvideo", "pipe:1"]
+    out, log = run_ffmpeg(cmd)
+    showinfo = parse_showinfo(log)
+    decoded, sampled = showinfo.get("0", []), showinfo.get("2", [])
+
+    frames = np.frombuffer(out, dtype=np.uint8)
+    frames = frames[:len(frames) - len(frames) % (SCENE_FRAME_SIZE * SCENE_FRAME_SIZE)]
+    frames = frames.reshape(-1, SCENE_FRAME_SIZE, SCENE_FRAME_SIZE)[:len(sampled)]
+    scene_changes = [locate_cut(decoded, sampled[i - 1]["time"], sampled[i]["time"])
+                     for i in detect_scene_changes(frames)]
+
+    keyframes = [{"time": frame["time"], "offset": frame["offset"]} for frame in decoded if frame["key"]]
+    if any(keyframe["offset"] is None for keyframe in keyframes):
+        offsets = get_keyframe_offsets(file_path)
+        for keyframe in keyframes:
+            matches = [offset for time, offset in offsets if abs(time - keyframe["time"]) <= KEYFRAME_MATCH_TOLERANCE]
+            keyframe["offset"] = matches[0] if matches else None
+    return scene_changes, keyframes
+
+def find_preceding_keyframe(keyframes, time):
+    times = [keyframe["time"] for keyframe in keyframes]
+    index = bisect_right(times, time) - 1
+    return times[index] if index >= 0 else 0
+
+def suggest_trims(scene_changes, duration):
+    boundaries = [0] + [t for t in scene_changes if 0 < t < duration] + [duration]
+    return [{"start_time": start, "end_time": end} for start, end in zip(boundaries, boundaries[1:])]
+
 @api_view(['POST'])
 def upload_video(request):
     file = request.FILES.get('file')
@@ -49,8 +185,16 @@ def upload_video(request):
     if not title:
         os.remove(temp_file_path)
         return Response({"error": "Title is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Build the scene-change/keyframe index in one decode; trimming still works without it
+    try:
+        scene_changes, keyframes = build_video_index(temp_file_path)
+    except Exception:
+        scene_changes, keyframes = None, None
+
     # Save valid video
-    video = Video.objects.create(file=file, title=title, duration=duration, size=file.size)
+    video = Video.objects.create(file=file, title=title, duration=duration, size=file.size,
+                                 scene_changes=scene_changes, keyframes=keyframes)
     serializer = VideoSerializer(video)
     os.remove(temp_file_path)  # Clean up temp file
 
@@ -82,9 +226,17 @@ def trim_video(request, pk):
     output_path = os.path.join(output_dir, trimmed_file_name)
 
     try:
-        with VideoFileClip(video_path) as clip:
-            trimmed_clip = clip.subclip(start_time, end_time)
-            trimmed_clip.write_videofile(output_path, codec="libx264")
+        if video.keyframes:
+            # Seek straight to the preceding keyframe, then decode only up to start_time
+            seek_time = min(find_preceding_keyframe(video.keyframes, start_time) + KEYFRAME_SEEK_EPSILON, start_time)
+            cmd = [get_setting("FFMPEG_BINARY"), "-y", "-ss", "%.6f" % seek_time, "-i", video_path,
+                   "-ss", "%.6f" % (start_time - seek_time), "-t", "%.6f" % (end_time - start_time),
+                   "-c:v", "libx264", "-c:a", "aac", output_path]
+            run_ffmpeg(cmd)
+        else:
+            with VideoFileClip(video_path) as clip:
+                trimmed_clip = clip.subclip(start_time, end_time)
+                trimmed_clip.write_videofile(output_path, codec="libx264")
     except OSError as e:
         return Response({"error": f"FFMPEG error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -93,6 +245,30 @@ def trim_video(request, pk):
 
 
 
+@api_view(['GET'])
+def video_index(request, pk):
+    try:
+        video = Video.objects.get(pk=pk)
+    except Video.DoesNotExist:
+        return Response({"error": "Video not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    # Videos uploaded before indexing existed are indexed on first request
+    if video.scene_changes is None or video.keyframes is None:
+        try:
+            if video.duration is None:
+                video.duration = get_video_duration(video.file.path)
+            video.scene_changes, video.keyframes = build_video_index(video.file.path)
+        except Exception as e:
+            return Response({"error": f"Error indexing video: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        video.save(update_fields=['scene_changes', 'keyframes', 'duration'])
+
+    return Response({
+        "scene_changes": video.scene_changes,
+        "keyframes": video.keyframes,
+        "suggested_trims": suggest_trims(video.scene_changes, video.duration),
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 def merge_videos(request):
     video_ids = request.data.get('video_ids', [])